@@ -51,177 +51,363 @@
 # A full-featured scientific calculator with Tkinter + safe AST evaluation.
 
 import tkinter as tk
+from collections import deque
 from tkinter import ttk, messagebox
 import math
 import ast
-import operator
-
-# -------- Safe Evaluator (no eval) --------
-class SafeEvaluator(ast.NodeVisitor):
+import functools
+import re
+from types import MappingProxyType
+
+# Optional: batch evaluation over arrays (SafeEvaluator.eval_many)
+try:
+    import numpy as np
+    from numba import njit, prange
+except ImportError:
+    np = None
+
+# -------- Safe Evaluator (whitelisted AST, no builtins) --------
+# Math functions (wrapping trig for deg/rad)
+def _wrap_trig(f):
+    return lambda x: f(math.radians(x))
+
+def _wrap_atrig(f):
+    return lambda x: math.degrees(f(x))
+
+def _log(x, b=10):
+    # log10/log2 are exact for powers of their base, unlike math.log(x, b)
+    if b == 10:
+        return math.log10(x)
+    if b == 2:
+        return math.log2(x)
+    return math.log(x, b)
+
+def _make_funcs(deg_mode):
+    trig = _wrap_trig if deg_mode else (lambda f: f)
+    atrig = _wrap_atrig if deg_mode else (lambda f: f)
+    return MappingProxyType({
+        "sin":  trig(math.sin),
+        "cos":  trig(math.cos),
+        "tan":  trig(math.tan),
+        "asin": atrig(math.asin),
+        "acos": atrig(math.acos),
+        "atan": atrig(math.atan),
+        "log":  _log,                            # log base 10 by default
+        "ln":   math.log,                        # natural log
+        "sqrt": math.sqrt,
+        "abs":  abs,
+        "floor": math.floor,
+        "ceil": math.ceil,
+        "fact": math.factorial,
+        "pow":  pow,
+    })
+
+class SafeEvaluator:
     """
     Safely evaluate a mathematical expression AST with whitelisted nodes & functions.
     Supports constants pi/e, variable Ans, and a deg/rad switch for trig.
     """
+    # Operators
+    bin_ops = frozenset({
+        ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    })
+    unary_ops = frozenset({ast.UAdd, ast.USub})
+
+    # Function tables are built once at import; instances just pick one.
+    _FUNCS_DEG = _make_funcs(deg_mode=True)
+    _FUNCS_RAD = _make_funcs(deg_mode=False)
+    _FUNC_NAMES = frozenset(_FUNCS_DEG)        # same names in both modes
+
+    # Constants
+    consts = {"pi": math.pi, "e": math.e}
+
     def __init__(self, variables=None, deg_mode=False):
-        super().__init__()
+        self.set_deg_mode(deg_mode)
         self.vars = variables or {}
-        self.deg_mode = deg_mode
 
-        # Operators
-        self.bin_ops = {
-            ast.Add: operator.add,
-            ast.Sub: operator.sub,
-            ast.Mult: operator.mul,
-            ast.Div: operator.truediv,
-            ast.FloorDiv: operator.floordiv,
-            ast.Mod: operator.mod,
-            ast.Pow: operator.pow,
-        }
-        self.unary_ops = {
-            ast.UAdd: operator.pos,
-            ast.USub: operator.neg,
-        }
-
-        # Math functions (wrapping trig for deg/rad)
-        def _wrap_trig(f):
-            return (lambda x: f(math.radians(x))) if self.deg_mode else f
-        def _wrap_atrig(f):
-            return (lambda x: math.degrees(f(x))) if self.deg_mode else f
-
-        self.funcs = {
-            "sin":  _wrap_trig(math.sin),
-            "cos":  _wrap_trig(math.cos),
-            "tan":  _wrap_trig(math.tan),
-            "asin": _wrap_atrig(math.asin),
-            "acos": _wrap_atrig(math.acos),
-            "atan": _wrap_atrig(math.atan),
-            "log":  lambda x, b=10: math.log(x, b),  # log base 10 by default
-            "ln":   math.log,                        # natural log
-            "sqrt": math.sqrt,
-            "abs":  abs,
-            "floor": math.floor,
-            "ceil": math.ceil,
-            "fact": math.factorial,
-            "pow":  pow,
-        }
-
-        # Constants
-        self.consts = {"pi": math.pi, "e": math.e}
-
-    def visit(self, node):
+    def set_deg_mode(self, deg_mode):
+        self.deg_mode = deg_mode
+        self.funcs = SafeEvaluator._FUNCS_DEG if deg_mode else SafeEvaluator._FUNCS_RAD
+        # namespace for eval(), derived from funcs; no builtins are reachable
+        self._globals = {"__builtins__": {}, **self.funcs, **self.consts}
+
+    @classmethod
+    def validate(cls, node, names):
+        """
+        Reject anything outside the whitelist before the tree is handed to
+        Python's compile(). Variable names (anything that isn't a constant or
+        a function) are appended to `names` so eval() can check them against
+        self.vars. Raises ValueError.
+        """
         if isinstance(node, ast.Expression):
-            return self.visit(node.body)
-        elif isinstance(node, ast.Num):  # Python <3.8; kept for safety
-            return node.n
+            cls.validate(node.body, names)
         elif isinstance(node, ast.Constant):
-            if isinstance(node.value, (int, float)):
-                return node.value
-            raise ValueError("Only numeric constants allowed.")
+            if not isinstance(node.value, (int, float)):
+                raise ValueError("Only numeric constants allowed.")
         elif isinstance(node, ast.BinOp):
-            op_type = type(node.op)
-            if op_type not in self.bin_ops:
+            if type(node.op) not in cls.bin_ops:
                 raise ValueError("Unsupported operator.")
-            left = self.visit(node.left)
-            right = self.visit(node.right)
-            return self.bin_ops[op_type](left, right)
+            cls.validate(node.left, names)
+            cls.validate(node.right, names)
         elif isinstance(node, ast.UnaryOp):
-            op_type = type(node.op)
-            if op_type not in self.unary_ops:
+            if type(node.op) not in cls.unary_ops:
                 raise ValueError("Unsupported unary operator.")
-            operand = self.visit(node.operand)
-            return self.unary_ops[op_type](operand)
+            cls.validate(node.operand, names)
         elif isinstance(node, ast.Call):
             if not isinstance(node.func, ast.Name):
                 raise ValueError("Only simple function calls allowed.")
-            name = node.func.id
-            if name not in self.funcs:
-                raise ValueError(f"Unknown function: {name}")
-            fn = self.funcs[name]
-            args = [self.visit(a) for a in node.args]
-            # Keyword args support for log(x, b)
-            kwargs = {kw.arg: self.visit(kw.value) for kw in node.keywords}
-            return fn(*args, **kwargs)
+            if node.func.id not in cls._FUNC_NAMES:
+                raise ValueError(f"Unknown function: {node.func.id}")
+            for a in node.args:
+                cls.validate(a, names)
+            # Keyword args support for log(x, b); no **kwargs unpacking
+            for kw in node.keywords:
+                if kw.arg is None:
+                    raise ValueError("Only simple function calls allowed.")
+                cls.validate(kw.value, names)
         elif isinstance(node, ast.Name):
-            if node.id in self.consts:
-                return self.consts[node.id]
-            if node.id in self.vars:
-                return self.vars[node.id]
-            raise ValueError(f"Unknown identifier: {node.id}")
-        elif isinstance(node, ast.Paren) or isinstance(node, ast.Tuple):
-            # Shouldn't normally hit; parentheses compile as BinOp nesting
-            return [self.visit(elt) for elt in node.elts]
+            # functions may only be called, not used as values
+            if node.id in cls._FUNC_NAMES:
+                raise ValueError(f"Unknown identifier: {node.id}")
+            if node.id not in cls.consts and node.id not in names:
+                names.append(node.id)
         else:
             raise ValueError("Unsupported syntax.")
 
     def eval(self, expr: str):
-        # Minor pre-processing:
-        expr = expr.replace("×", "*").replace("÷", "/").replace("^", "**")
-        # Percent: replace trailing % tokens (e.g., "50%" -> "50/100")
-        # also "200 + 10%" -> "200 + (10/100)"
-        expr = expr.replace("%", "/100")
-
-        # factorial via fact(), but also allow postfix "!" -> fact(x)
-        # handle simple patterns: numbers or ) before !
-        # Convert "5!" -> "fact(5)" and "(2+3)!" -> "fact((2+3))"
-        def _replace_factorial(s):
-            out = []
-            i = 0
-            while i < len(s):
-                if s[i] == "!":
-                    # shouldn't start with !
-                    out.append("!")
-                    i += 1
-                    continue
-                if s[i] == ")":
-                    # find matching '('
-                    depth = 1
-                    j = len(out) - 1
-                    while j >= 0:
-                        if out[j] == ")":
-                            depth += 1
-                        elif out[j] == "(":
-                            depth -= 1
-                            if depth == 0:
-                                break
-                        j -= 1
-                    # check next char(s) for !
-                    k = i + 1
-                    if k < len(s) and s[k] == "!":
-                        # insert fact around the parenthesized expr
-                        out.insert(j, "fact(")
-                        out.append(")")
-                        i = k + 1
-                        continue
-                # number literal followed by !
-                if s[i].isdigit():
-                    j = i
-                    while j < len(s) and (s[j].isdigit() or s[j] == "."):
-                        out.append(s[j]); j += 1
-                    # If next is !, wrap the number with fact()
-                    if j < len(s) and s[j] == "!":
-                        # backtrack number
-                        num_len = j - i
-                        for _ in range(num_len):
-                            out.pop()
-                        out.append(f"fact({s[i:j]})")
-                        i = j + 1
-                        continue
-                    i = j
-                    continue
-                out.append(s[i]); i += 1
-            return "".join(out)
-
-        expr = _replace_factorial(expr)
-
+        # Plain numbers (e.g. a result recalled from history) skip the AST.
+        # float() also accepts "inf"/"nan", which aren't valid input here.
         try:
-            node = ast.parse(expr, mode="eval")
-        except SyntaxError:
-            raise ValueError("Syntax error.")
-
-        return self.visit(node)
+            val = float(expr)
+        except ValueError:
+            pass
+        else:
+            if math.isfinite(val):
+                return val
+        code, names = _compile_code(expr)
+        for name in names:
+            if name not in self.vars:
+                raise ValueError(f"Unknown identifier: {name}")
+        # vars are the locals, so Ans is read fresh on every call
+        return eval(code, self._globals, self.vars)
+
+    def eval_many(self, expr: str, var_arrays):
+        """
+        Evaluate expr element-wise over equally sized arrays, e.g.
+        eval_many("sin(x)^2 + Ans", {"x": xs}). Names missing from var_arrays
+        fall back to self.vars and are broadcast. Requires numpy and numba.
+        """
+        if np is None:
+            raise RuntimeError("eval_many requires numpy and numba.")
+        kernel, names = _compile_kernel(expr, self.deg_mode)
+        arrays = {k: np.ascontiguousarray(a, dtype=np.float64) for k, a in var_arrays.items()}
+        n = len(next(iter(arrays.values()))) if arrays else 1
+        args = []
+        for name in names:
+            if name in arrays:
+                a = arrays[name]
+                if a.shape != (n,):
+                    raise ValueError("All input arrays must be 1-D and the same length.")
+            elif name in self.vars:
+                a = np.full(n, self.vars[name], dtype=np.float64)
+            else:
+                raise ValueError(f"Unknown identifier: {name}")
+            args.append(a)
+        out = np.empty(n, dtype=np.float64)
+        kernel(out, *args)
+        return out
+
+
+# -------- Expression cache --------
+_TRANS = str.maketrans({"×": "*", "÷": "/"})
+_FACT_NUM_RE = re.compile(r"(\d+(?:\.\d+)?)!(?!!)")
+
+def _replace_factorial(s):
+    # factorial via fact(), but also allow postfix "!" -> fact(x)
+    # Convert "5!" -> "fact(5)" and "(2+3)!" -> "fact((2+3))"
+    # A chained "!!" is left as typed so ast.parse rejects it: it isn't
+    # (n!)! in usual notation, and nesting would blow up fact().
+    s = _FACT_NUM_RE.sub(r"fact(\1)", s)
+    if "!" not in s:
+        return s
+    # Single left-to-right pass: each open '(' starts a new buffer, and when
+    # its ')' arrives the group is joined and wrapped if a '!' follows.
+    # A function name right before '(' belongs to the group, so "sin(x)!"
+    # becomes "fact(sin(x))".
+    stack = [[]]
+    i, n = 0, len(s)
+    while i < n:
+        ch = s[i]
+        if ch == "(":
+            buf = stack[-1]
+            j = len(buf)
+            while j and len(buf[j - 1]) == 1 and (buf[j - 1].isalnum() or buf[j - 1] == "_"):
+                j -= 1
+            stack.append(buf[j:] + ["("])
+            del buf[j:]
+        elif ch == ")" and len(stack) > 1:
+            group = "".join(stack.pop()) + ")"
+            if i + 1 < n and s[i + 1] == "!" and s[i + 2:i + 3] != "!":
+                group = f"fact({group})"
+                i += 1
+            stack[-1].append(group)
+        else:
+            stack[-1].append(ch)
+        i += 1
+    # Unbalanced '(' are left as typed; ast.parse will report them.
+    return "".join("".join(buf) for buf in stack)
+
+@functools.lru_cache(maxsize=256)
+def _preprocess(expr):
+    # Minor pre-processing:
+    # Percent: replace trailing % tokens (e.g., "50%" -> "50/100")
+    # also "200 + 10%" -> "200 + (10/100)"
+    expr = expr.translate(_TRANS).replace("^", "**").replace("%", "/100")
+    # most entries have no postfix factorial; skip the regex and scan then
+    if "!" in expr:
+        expr = _replace_factorial(expr)
+    return expr
+
+@functools.lru_cache(maxsize=256)
+def _compile(expr):
+    # Parsed trees are cached by the raw entry text, so repeated "=" / M+ / M-
+    # on the same expression skip both pre-processing and ast.parse.
+    try:
+        return ast.parse(_preprocess(expr), mode="eval")
+    except SyntaxError:
+        raise ValueError("Syntax error.")
+
+@functools.lru_cache(maxsize=256)
+def _compile_code(expr):
+    # Validated once, then run as bytecode. Function and constant names are
+    # looked up at run time, so one code object serves both Deg and Rad.
+    node = _compile(expr)
+    names = []
+    SafeEvaluator.validate(node, names)
+    return compile(node, "<calc>", "eval"), tuple(names)
+
+# -------- Batch kernels (numba) --------
+_BATCH_BIN_OPS = {
+    ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/",
+    ast.FloorDiv: "//", ast.Mod: "%", ast.Pow: "**",
+}
+_BATCH_UNARY_OPS = {ast.UAdd: "+", ast.USub: "-"}
+
+# name -> (parameters, number required, source template)
+_BATCH_FUNCS = {
+    "sin":   (("x",), 1, "sin({0})"),
+    "cos":   (("x",), 1, "cos({0})"),
+    "tan":   (("x",), 1, "tan({0})"),
+    "asin":  (("x",), 1, "asin({0})"),
+    "acos":  (("x",), 1, "acos({0})"),
+    "atan":  (("x",), 1, "atan({0})"),
+    "log":   (("x", "b"), 1, "(log({0}) / log({1}))"),
+    "ln":    (("x",), 1, "log({0})"),
+    "sqrt":  (("x",), 1, "sqrt({0})"),
+    "abs":   (("x",), 1, "abs({0})"),
+    "floor": (("x",), 1, "floor({0})"),
+    "ceil":  (("x",), 1, "ceil({0})"),
+    "pow":   (("base", "exp"), 2, "({0} ** {1})"),
+}
+# trig wrapping mirrors _FUNCS_DEG
+_BATCH_DEG_TEMPLATES = {
+    "sin": "sin(radians({0}))", "cos": "cos(radians({0}))", "tan": "tan(radians({0}))",
+    "asin": "degrees(asin({0}))", "acos": "degrees(acos({0}))", "atan": "degrees(atan({0}))",
+}
+# Only the Python-level log() and pow() take keyword arguments in eval().
+_BATCH_KEYWORDS = frozenset({"log", "pow"})
+
+_KERNEL_NS = {name: getattr(math, name) for name in (
+    "sin", "cos", "tan", "asin", "acos", "atan", "radians", "degrees",
+    "log", "log10", "sqrt", "floor", "ceil")}
+_KERNEL_NS["_INF"] = math.inf      # e.g. "1e400" parses to inf, which has no literal
+
+# fastmath without nnan/ninf: inf constants and per-element domain errors
+# such as sqrt(-1) or log(0) must come out as inf/nan, not undefined values
+_FASTMATH = {"contract", "reassoc", "arcp"}
+
+_KERNEL_TEMPLATE = """\
+def _kernel(out{params}):
+    for i in prange(out.shape[0]):
+        out[i] = {body}
+"""
+
+def _emit(node, deg_mode):
+    # Lower a validated AST to Python source for the eval_many kernel;
+    # variables become v_<name>[i].
+    if isinstance(node, ast.Constant):
+        val = float(node.value)
+        return repr(val) if math.isfinite(val) else "_INF"
+    elif isinstance(node, ast.BinOp):
+        op = _BATCH_BIN_OPS[type(node.op)]
+        return f"({_emit(node.left, deg_mode)} {op} {_emit(node.right, deg_mode)})"
+    elif isinstance(node, ast.UnaryOp):
+        return f"({_BATCH_UNARY_OPS[type(node.op)]}{_emit(node.operand, deg_mode)})"
+    elif isinstance(node, ast.Call):
+        name = node.func.id
+        if name not in _BATCH_FUNCS:
+            raise ValueError(f"{name}() is not supported in batch mode.")
+        params, required, template = _BATCH_FUNCS[name]
+        if node.keywords and name not in _BATCH_KEYWORDS:
+            raise ValueError(f"{name}() takes no keyword arguments.")
+        if len(node.args) > len(params):
+            raise ValueError(f"Wrong number of arguments to {name}().")
+        # bind positional then keyword arguments to parameter slots
+        bound = [_emit(a, deg_mode) for a in node.args]
+        bound += [None] * (len(params) - len(bound))
+        for kw in node.keywords:
+            if kw.arg not in params or bound[params.index(kw.arg)] is not None:
+                raise ValueError(f"Unexpected keyword argument to {name}(): {kw.arg}")
+            bound[params.index(kw.arg)] = _emit(kw.value, deg_mode)
+        if None in bound[:required]:
+            raise ValueError(f"Wrong number of arguments to {name}().")
+        if name == "log" and bound[1] is None:
+            return f"log10({bound[0]})"
+        if deg_mode:
+            template = _BATCH_DEG_TEMPLATES.get(name, template)
+        return template.format(*bound)
+    else:  # ast.Name
+        if node.id in SafeEvaluator.consts:
+            return repr(SafeEvaluator.consts[node.id])
+        return f"v_{node.id}[i]"
+
+def _kernel_source(expr, deg_mode):
+    # Source for the batch loop plus its variable parameters, in order.
+    # Validation is shared with eval(), so the same input is rejected.
+    node = _compile(expr)
+    names = []
+    SafeEvaluator.validate(node, names)
+    body = _emit(node.body, deg_mode)
+    return _KERNEL_TEMPLATE.format(params="".join(f", v_{n}" for n in names), body=body), tuple(names)
+
+@functools.lru_cache(maxsize=64)
+def _compile_kernel(expr, deg_mode):
+    # One jitted loop over all inputs replaces a tree walk per element.
+    src, names = _kernel_source(expr, deg_mode)
+    ns = dict(_KERNEL_NS, prange=prange)
+    exec(src, ns)
+    return njit(fastmath=_FASTMATH, parallel=True)(ns["_kernel"]), names
+
+# -------- Formatting --------
+@functools.lru_cache(maxsize=1024)
+def _fmt(x: float) -> str:
+    # Nicely format floats (avoid too many decimals)
+    if abs(x) < 1e-9:
+        x = 0.0
+    return f"{x:.12g}"
 
 # -------- GUI --------
 class CalcApp(tk.Tk):
+    # Functions & tokens: button label -> text inserted by _press
+    _TOKEN_MAP = {
+        "mod": "%", "Ans": "Ans", "pi": "pi", "e": "e",
+        "sqrt": "sqrt(", "sin":"sin(", "cos":"cos(", "tan":"tan(",
+        "asin":"asin(", "acos":"acos(", "atan":"atan(",
+        "ln":"ln(", "log":"log(", "abs":"abs(", "floor":"floor(", "ceil":"ceil(",
+        "!":"!", "^":"^", "//":"//", "+/-":"sign",
+        "Enter":"=",  # alias
+    }
+
     def __init__(self):
         super().__init__()
         self.title("Advanced Calculator")
@@ -232,8 +418,13 @@ class CalcApp(tk.Tk):
         self.deg_mode = tk.BooleanVar(value=True)     # Deg by default
         self.memory = 0.0
         self.ans = 0.0
-        self.undo_stack = []
-        self.redo_stack = []
+        self.undo_stack = deque(maxlen=200)
+        self.redo_stack = deque(maxlen=200)
+        self._history = deque(maxlen=200)    # mirrors the Listbox, newest first
+        # one evaluator for the app's lifetime; Ans is updated in place
+        self._evaluator = SafeEvaluator(variables={"Ans": 0.0}, deg_mode=True)
+        # last (expr, ans, deg_mode, result); re-evaluating an unchanged entry is free
+        self._last_eval = (None, None, None, None)
 
         self._build_ui()
         self._bind_keys()
@@ -301,33 +492,53 @@ class CalcApp(tk.Tk):
         if "vista" in style.theme_names():
             style.theme_use("vista")
 
+    # keysym -> button label for keys handled by _press instead of the Entry
+    _KEY_ACTIONS = {"Return": "=", "KP_Enter": "=", "Escape": "C"}
+
     def _bind_keys(self):
-        self.bind("<Return>", lambda e: self._press("="))
-        self.bind("<KP_Enter>", lambda e: self._press("="))
-        self.bind("<Escape>", lambda e: self._press("C"))
-        self.bind("<BackSpace>", lambda e: self._press("⌫"))
         self.bind("<Control-z>", lambda e: self._undo())
         self.bind("<Control-y>", lambda e: self._redo())
-        # Directly insert printable keys
-        for ch in "0123456789.+-*/()^%":
-            self.bind(ch, self._insert_key)
-        self.bind("<Key>", self._on_any_key)
+        # One handler for every key. Run the window's bindings before the
+        # Entry's class bindings so "break" can stop the default handling.
+        self.entry.bindtags((str(self.entry), str(self), "TEntry", "all"))
+        self.bind("<KeyPress>", self._on_key)
 
     # ---- Actions ----
-    def _insert_key(self, e):
-        self._snapshot()
-        self.entry.insert("insert", e.char)
-
-    def _on_any_key(self, e):
-        # keep redo stack sane if user types
+    def _on_key(self, e):
+        label = self._KEY_ACTIONS.get(e.keysym)
+        if label:
+            self._press(label)
+            return "break"
+        if e.keysym == "BackSpace":
+            # the Entry deletes at the caret / selection; only ⌫ from elsewhere
+            if e.widget is not self.entry:
+                self._press("⌫")
+                return "break"
+            self._snapshot()
+            return
         if e.char and e.char.isprintable():
+            elsewhere = e.widget is not self.entry
+            # Space activates a focused Button/Checkbutton; it isn't typing
+            if elsewhere and e.keysym == "space":
+                return
+            self._snapshot()
+            # keep redo stack sane if user types
             self.redo_stack.clear()
+            # the Entry inserts the char itself; only type into it from elsewhere
+            if elsewhere:
+                self.entry.insert("insert", e.char)
+                return "break"
 
     def _on_mode_change(self):
+        self._evaluator.set_deg_mode(self.deg_mode.get())
         self.info.config(text=f"Mode changed to {'Degrees' if self.deg_mode.get() else 'Radians'}.")
 
     def _snapshot(self):
-        self.undo_stack.append(self.entry.get())
+        s = self.entry.get()
+        # skip repeated snapshots of an unchanged entry
+        if self.undo_stack and self.undo_stack[-1] == s:
+            return
+        self.undo_stack.append(s)
 
     def _undo(self):
         if self.undo_stack:
@@ -346,7 +557,7 @@ class CalcApp(tk.Tk):
     def _on_history_double(self, _):
         sel = self.hist.curselection()
         if not sel: return
-        text = self.hist.get(sel[0])
+        text = self._history[sel[0]]
         # history line stored as "expr = result"
         if " = " in text:
             expr, result = text.split(" = ", 1)
@@ -387,16 +598,6 @@ class CalcApp(tk.Tk):
                 messagebox.showerror("Memory Error", str(e))
             return
 
-        # Functions & tokens
-        token_map = {
-            "mod": "%", "Ans": "Ans", "pi": "pi", "e": "e",
-            "sqrt": "sqrt(", "sin":"sin(", "cos":"cos(", "tan":"tan(",
-            "asin":"asin(", "acos":"acos(", "atan":"atan(",
-            "ln":"ln(", "log":"log(", "abs":"abs(", "floor":"floor(", "ceil":"ceil(",
-            "!":"!", "^":"^", "//":"//", "+/-":"sign",
-            "Enter":"=",  # alias
-        }
-
         if label == "=":
             self._do_equals()
             return
@@ -413,7 +614,7 @@ class CalcApp(tk.Tk):
             return
 
         self._snapshot()
-        insert = token_map.get(label, label)
+        insert = CalcApp._TOKEN_MAP.get(label, label)
         # auto closing bracket helper for functions if user immediately presses ')'
         self.entry.insert("insert", insert)
 
@@ -421,13 +622,16 @@ class CalcApp(tk.Tk):
         expr = self.entry.get().strip()
         if not expr:
             return 0.0
-        # build variables
-        variables = {"Ans": self.ans}
-        ev = SafeEvaluator(variables=variables, deg_mode=self.deg_mode.get())
-        val = ev.eval(expr)
+        key = (expr, self.ans, self.deg_mode.get())
+        if key == self._last_eval[:3]:
+            return self._last_eval[3]
+        self._evaluator.vars["Ans"] = self.ans
+        val = self._evaluator.eval(expr)
         if isinstance(val, complex):
             raise ValueError("Complex results not supported.")
-        return float(val)
+        val = float(val)
+        self._last_eval = key + (val,)
+        return val
 
     def _do_equals(self):
         expr = self.entry.get().strip()
@@ -436,25 +640,26 @@ class CalcApp(tk.Tk):
         try:
             val = self._evaluate_silent()
             self.ans = val
-            self.ans_lbl.config(text=f"Ans = {self._fmt(val)}")
+            self.ans_lbl.config(text=f"Ans = {_fmt(val)}")
             self._append_history(expr, val)
             self.entry.delete(0, "end")
-            self.entry.insert(0, self._fmt(val))
+            self.entry.insert(0, _fmt(val))
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
-    def _fmt(self, x):
-        # Nicely format floats (avoid too many decimals)
-        if abs(x) < 1e-9:
-            x = 0.0
-        s = f"{x:.12g}"
-        return s
-
     def _append_history(self, expr, val):
-        self.hist.insert(0, f"{expr} = {self._fmt(val)}")
-        # keep list manageable
-        if self.hist.size() > 200:
-            self.hist.delete("end")
+        # a repeated "=" shouldn't add another line: after the first one the
+        # entry already holds the formatted result, e.g. "6 = 6"
+        if expr == _fmt(val):
+            return
+        line = f"{expr} = {_fmt(val)}"
+        # keep list manageable: the deque drops its oldest line by itself,
+        # so the Listbox only needs trimming once it's full
+        full = len(self._history) == self._history.maxlen
+        self._history.appendleft(line)
+        self.hist.insert(0, line)
+        if full:
+            self.hist.delete(self._history.maxlen, "end")
 
 if __name__ == "__main__":
     app = CalcApp()